@@ -1,9 +1,15 @@
 import streamlit as st
-import sqlite3
-import pandas as pd
-from datetime import datetime, date, time
+import numpy as np
+from datetime import date, time
 import calendar
 
+from db import insert_many
+from queries import (
+    get_income_df, get_expense_df, get_itinerary_df, expense_names, expense_budget_map,
+    available_years, month_totals, category_actuals, over_budget_categories,
+)
+from exports import auto_backup, export_excel_bytes, generate_pdf_bytes, get_executor
+
 # =========================
 # PAGE CONFIG
 # =========================
@@ -13,83 +19,29 @@ st.set_page_config(
     layout="wide"
 )
 
-# =========================
-# DATABASE
-# =========================
-conn = sqlite3.connect("app.db", check_same_thread=False)
-cur = conn.cursor()
-
-cur.execute("""
-CREATE TABLE IF NOT EXISTS income (
-    id INTEGER PRIMARY KEY,
-    tanggal TEXT,
-    contributor TEXT,
-    account TEXT,
-    amount REAL
-)
-""")
-
-cur.execute("""
-CREATE TABLE IF NOT EXISTS expense_category (
-    id INTEGER PRIMARY KEY,
-    name TEXT,
-    monthly_budget REAL
-)
-""")
-
-cur.execute("""
-CREATE TABLE IF NOT EXISTS itinerary (
-    id INTEGER PRIMARY KEY,
-    tanggal TEXT,
-    activity TEXT,
-    place TEXT,
-    start_time TEXT,
-    end_time TEXT,
-    duration INTEGER,
-    category TEXT,
-    planned_budget REAL,
-    actual_budget REAL
-)
-""")
-
-conn.commit()
-
 # =========================
 # HELPERS
 # =========================
-def load_df(query, cols):
-    try:
-        df = pd.read_sql(query, conn)
-    except:
-        df = pd.DataFrame(columns=cols)
-
-    for c in cols:
-        if c not in df.columns:
-            df[c] = None
-    return df[cols]
+MONTH_NAMES = list(calendar.month_name)[1:]
+MONTH_INDEX = {n: i + 1 for i, n in enumerate(MONTH_NAMES)}
 
 def calc_duration(start, end):
-    delta = datetime.combine(date.today(), end) - datetime.combine(date.today(), start)
-    return max(int(delta.total_seconds() / 60), 0)
+    return max((end.hour - start.hour) * 60 + end.minute - start.minute, 0)
 
 # =========================
-# LOAD DATA
+# AUTO MONTHLY BACKUP
 # =========================
-income_df = load_df(
-    "SELECT * FROM income",
-    ["id", "tanggal", "contributor", "account", "amount"]
-)
-expense_df = load_df(
-    "SELECT * FROM expense_category",
-    ["id", "name", "monthly_budget"]
-)
-itinerary_df = load_df(
-    "SELECT * FROM itinerary",
-    ["id","tanggal","activity","place","start_time","end_time","duration","category","planned_budget","actual_budget"]
-)
+auto_backup()
 
-income_df["tanggal"] = pd.to_datetime(income_df["tanggal"], errors="coerce")
-itinerary_df["tanggal"] = pd.to_datetime(itinerary_df["tanggal"], errors="coerce")
+# =========================
+# OVER-BUDGET BANNER
+# =========================
+@st.fragment
+def overbudget_banner():
+    today = date.today()
+    over = over_budget_categories(today.year, today.month)
+    if over:
+        st.sidebar.warning("⚠️ Over budget bulan ini: " + ", ".join(over))
 
 # =========================
 # SIDEBAR MENU
@@ -100,6 +52,29 @@ menu = st.sidebar.radio(
     ["🏠 Dashboard", "💰 Income", "📦 Expenses", "🗺️ Itinerary"]
 )
 
+overbudget_banner()
+
+def sidebar_download(key, label, file_name):
+    fut = st.session_state.get(key)
+    if fut is None:
+        return
+    if not fut.done():
+        st.sidebar.info("⏳ Menyiapkan export...")
+    elif fut.exception() is not None:
+        st.sidebar.error("Export gagal 😢")
+    else:
+        st.sidebar.download_button(label, fut.result(), file_name=file_name)
+
+st.sidebar.divider()
+if st.sidebar.button("📤 Export Excel"):
+    st.session_state["export_fut"] = get_executor().submit(export_excel_bytes)
+sidebar_download("export_fut", "⬇️ Download Excel", f"export_{date.today()}.xlsx")
+
+if st.sidebar.button("🧾 Laporan PDF"):
+    today = date.today()
+    st.session_state["pdf_fut"] = get_executor().submit(generate_pdf_bytes, today.year, today.month)
+sidebar_download("pdf_fut", "⬇️ Download PDF", f"laporan_{date.today():%Y_%m}.pdf")
+
 # =========================
 # DASHBOARD
 # =========================
@@ -107,22 +82,11 @@ if menu == "🏠 Dashboard":
     st.title("🏠 Dashboard Bulanan")
 
     col1, col2 = st.columns(2)
-    year = col1.selectbox("Tahun", sorted(income_df["tanggal"].dt.year.dropna().unique()) or [datetime.now().year])
-    month_name = col2.selectbox("Bulan", list(calendar.month_name)[1:])
-    month = list(calendar.month_name).index(month_name)
+    year = col1.selectbox("Tahun", available_years())
+    month_name = col2.selectbox("Bulan", MONTH_NAMES)
+    month = MONTH_INDEX[month_name]
 
-    inc = income_df[
-        (income_df["tanggal"].dt.year == year) &
-        (income_df["tanggal"].dt.month == month)
-    ]
-
-    iti = itinerary_df[
-        (itinerary_df["tanggal"].dt.year == year) &
-        (itinerary_df["tanggal"].dt.month == month)
-    ]
-
-    total_income = inc["amount"].sum()
-    total_expense = iti["actual_budget"].sum()
+    total_income, total_expense = month_totals(int(year), month)
 
     c1, c2, c3 = st.columns(3)
     c1.metric("💰 Total Income", f"Rp {total_income:,.0f}")
@@ -132,17 +96,26 @@ if menu == "🏠 Dashboard":
     st.divider()
     st.subheader("📊 Progress Budget")
 
+    expense_df = get_expense_df()
     if expense_df.empty:
         st.info("Belum ada kategori expense")
     else:
-        for _, row in expense_df.iterrows():
-            actual = iti[iti["category"] == row["name"]]["actual_budget"].sum()
-            planned = row["monthly_budget"]
-            ratio = min(actual / planned, 1) if planned > 0 else 0
+        actuals = category_actuals(int(year), month)
+        progress_df = expense_df.assign(actual=expense_df["name"].map(actuals).fillna(0.0))
+        ratio = progress_df["actual"] / progress_df["monthly_budget"]
+        progress_df["ratio"] = ratio.where(progress_df["monthly_budget"] > 0, 0).clip(0, 1)
 
-            st.write(f"**{row['name']}**")
-            st.progress(ratio)
-            st.caption(f"Planned: Rp {planned:,.0f} | Actual: Rp {actual:,.0f}")
+        st.dataframe(
+            progress_df[["name", "monthly_budget", "actual", "ratio"]],
+            column_config={
+                "name": "Kategori",
+                "monthly_budget": st.column_config.NumberColumn("Planned", format="Rp %.0f"),
+                "actual": st.column_config.NumberColumn("Actual", format="Rp %.0f"),
+                "ratio": st.column_config.ProgressColumn("Progress", min_value=0, max_value=1),
+            },
+            use_container_width=True,
+            hide_index=True
+        )
 
 # =========================
 # INCOME
@@ -160,16 +133,20 @@ elif menu == "💰 Income":
         amount = c4.number_input("Amount", min_value=0.0)
 
         if st.form_submit_button("Tambah Income"):
-            cur.execute(
+            insert_many(
                 "INSERT INTO income VALUES (NULL,?,?,?,?)",
-                (str(tanggal), contributor, account, amount)
+                [(tanggal.isoformat(), contributor, account, amount)],
+                caches=(get_income_df, month_totals, available_years)
             )
-            conn.commit()
             st.success("Income berhasil ditambahkan 💸")
 
     st.divider()
     st.subheader("📄 Riwayat Income")
-    st.dataframe(income_df.sort_values("tanggal", ascending=False), use_container_width=True)
+    income_df = get_income_df()
+    recent = income_df.nlargest(200, "tanggal")[["tanggal", "contributor", "account", "amount"]]
+    st.dataframe(recent, use_container_width=True)
+    if len(income_df) > 200:
+        st.caption("Menampilkan 200 transaksi terbaru")
 
 # =========================
 # EXPENSES
@@ -182,15 +159,15 @@ elif menu == "📦 Expenses":
         budget = st.number_input("Monthly Budget", min_value=0.0)
 
         if st.form_submit_button("Tambah Kategori"):
-            cur.execute(
+            insert_many(
                 "INSERT INTO expense_category VALUES (NULL,?,?)",
-                (name, budget)
+                [(name, budget)],
+                caches=(get_expense_df, expense_names, expense_budget_map, over_budget_categories)
             )
-            conn.commit()
             st.success("Kategori berhasil ditambahkan 🎯")
 
     st.divider()
-    st.dataframe(expense_df, use_container_width=True)
+    st.dataframe(get_expense_df(), use_container_width=True)
 
 # =========================
 # ITINERARY
@@ -200,7 +177,10 @@ elif menu == "🗺️ Itinerary":
 
     selected_date = st.date_input("📅 Pilih Tanggal")
 
-    daily = itinerary_df[itinerary_df["tanggal"] == pd.to_datetime(selected_date)]
+    itinerary_df = get_itinerary_df()
+    daily = itinerary_df[
+        itinerary_df["tanggal"].values.astype("datetime64[D]") == np.datetime64(selected_date, "D")
+    ]
 
     if daily.empty:
         st.info("Belum ada itinerary hari ini")
@@ -226,20 +206,20 @@ elif menu == "🗺️ Itinerary":
 
         duration = calc_duration(start, end)
 
-        category = st.selectbox("Kategori Expense", expense_df["name"].tolist())
-        planned = expense_df[expense_df["name"] == category]["monthly_budget"].values[0] if not expense_df.empty else 0
+        category = st.selectbox("Kategori Expense", expense_names())
+        planned = expense_budget_map().get(category, 0)
         actual = st.number_input("Budget Aktual", min_value=0.0)
 
         st.caption(f"⏱️ Durasi: {duration} menit")
         st.caption(f"💰 Estimasi Budget: Rp {planned:,.0f}")
 
         if st.form_submit_button("Simpan Itinerary"):
-            cur.execute("""
+            insert_many("""
             INSERT INTO itinerary VALUES (NULL,?,?,?,?,?,?,?,?,?)
-            """, (
-                str(selected_date), activity, place,
+            """, [(
+                selected_date.isoformat(), activity, place,
                 start.strftime("%H:%M"), end.strftime("%H:%M"),
                 duration, category, planned, actual
-            ))
-            conn.commit()
+            )], caches=(get_itinerary_df, month_totals, category_actuals,
+                        over_budget_categories, available_years))
             st.success("Itinerary berhasil ditambahkan 🥰")
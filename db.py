@@ -0,0 +1,85 @@
+import sqlite3
+
+import streamlit as st
+
+# =========================
+# CONNECTION + SCHEMA
+# =========================
+@st.cache_resource
+def init_db(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.executescript("""
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-20000;
+
+    CREATE TABLE IF NOT EXISTS income (
+        id INTEGER PRIMARY KEY,
+        tanggal TEXT,
+        contributor TEXT,
+        account TEXT,
+        amount REAL
+    );
+
+    CREATE TABLE IF NOT EXISTS expense_category (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        monthly_budget REAL
+    );
+
+    CREATE TABLE IF NOT EXISTS itinerary (
+        id INTEGER PRIMARY KEY,
+        tanggal TEXT,
+        activity TEXT,
+        place TEXT,
+        start_time TEXT,
+        end_time TEXT,
+        duration INTEGER,
+        category TEXT,
+        planned_budget REAL,
+        actual_budget REAL
+    );
+
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+
+    DROP INDEX IF EXISTS ix_income_tanggal;
+    DROP INDEX IF EXISTS ix_itinerary_tanggal_cat;
+    CREATE INDEX IF NOT EXISTS ix_income_cover ON income(tanggal, amount);
+    CREATE INDEX IF NOT EXISTS ix_itinerary_cover ON itinerary(tanggal, category, actual_budget);
+    ANALYZE;
+    """)
+    return conn
+
+conn = init_db("app.db")
+
+# No module-level cursor on purpose: the background executor shares this
+# connection, and sqlite3 serializes the connection but not a cursor.
+# Every statement below opens its own cursor via conn.execute().
+
+# =========================
+# WRITE HELPERS
+# =========================
+def insert_many(sql, rows, caches=()):
+    with conn:
+        conn.executemany(sql, rows)
+    for cache in caches:
+        cache.clear()
+
+def get_setting(key):
+    row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def set_setting(key, value):
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO settings VALUES (?,?)", (key, value))
+
+def table_signature():
+    return conn.execute("""
+        SELECT (SELECT COALESCE(MAX(rowid),0) || '/' || COUNT(*) FROM income)
+        || '|' || (SELECT COALESCE(MAX(rowid),0) || '/' || COUNT(*) FROM expense_category)
+        || '|' || (SELECT COALESCE(MAX(rowid),0) || '/' || COUNT(*) FROM itinerary)
+    """).fetchone()[0]
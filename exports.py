@@ -0,0 +1,75 @@
+import calendar
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+from db import get_setting, set_setting, table_signature
+from queries import (
+    get_income_df, get_expense_df, get_itinerary_df,
+    month_totals, category_actuals,
+)
+
+BACKUP_DIR = "backups"
+
+# Built once at import: getSampleStyleSheet() rebuilds the whole default
+# stylesheet on every call, which is pure waste per report.
+_STYLES = getSampleStyleSheet()
+_TITLE = _STYLES["Title"]
+_NORMAL = _STYLES["Normal"]
+
+@st.cache_resource
+def get_executor():
+    return ThreadPoolExecutor(max_workers=2)
+
+def export_excel(target):
+    with pd.ExcelWriter(
+        target,
+        engine="xlsxwriter",
+        engine_kwargs={"options": {"constant_memory": True}}
+    ) as writer:
+        get_income_df().to_excel(writer, sheet_name="Income", index=False)
+        get_expense_df().to_excel(writer, sheet_name="Expenses", index=False)
+        get_itinerary_df().to_excel(writer, sheet_name="Itinerary", index=False)
+    return target
+
+def export_excel_bytes():
+    buf = io.BytesIO()
+    export_excel(buf)
+    return buf.getvalue()
+
+def generate_pdf_bytes(year, month):
+    total_income, total_expense = month_totals(year, month)
+    actuals = category_actuals(year, month)
+
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=A4)
+    story = [
+        Paragraph(f"Laporan Bulanan {calendar.month_name[month]} {year}", _TITLE),
+        Spacer(1, 12),
+        Paragraph(f"Total Income: Rp {total_income:,.0f}", _NORMAL),
+        Paragraph(f"Total Expense: Rp {total_expense:,.0f}", _NORMAL),
+        Paragraph(f"Balance: Rp {total_income - total_expense:,.0f}", _NORMAL),
+    ]
+    if actuals:
+        story.append(Spacer(1, 12))
+        story.append(Table(
+            [["Kategori", "Actual"]] +
+            [[name, f"Rp {total:,.0f}"] for name, total in actuals.items()]
+        ))
+    doc.build(story)
+    return buf.getvalue()
+
+def auto_backup():
+    backup_key = f"backup_{datetime.now():%Y_%m}"
+    sig = table_signature()
+    if get_setting(backup_key) != sig:
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        export_excel(os.path.join(BACKUP_DIR, f"{backup_key}.xlsx"))
+        set_setting(backup_key, sig)
@@ -0,0 +1,114 @@
+from datetime import date, datetime
+
+import pandas as pd
+import streamlit as st
+
+from db import conn
+
+# =========================
+# QUERIES
+# =========================
+SQL_INCOME_ALL = "SELECT * FROM income"
+SQL_EXPENSE_ALL = "SELECT * FROM expense_category"
+SQL_ITINERARY_ALL = "SELECT * FROM itinerary"
+
+SQL_MONTH_TOTALS = """
+SELECT
+    (SELECT COALESCE(SUM(amount), 0) FROM income
+     WHERE tanggal >= ? AND tanggal < ?),
+    (SELECT COALESCE(SUM(actual_budget), 0) FROM itinerary
+     WHERE tanggal >= ? AND tanggal < ?)
+"""
+
+SQL_CATEGORY_ACTUALS = """
+SELECT category, COALESCE(SUM(actual_budget), 0)
+FROM itinerary
+WHERE tanggal >= ? AND tanggal < ?
+GROUP BY category
+"""
+
+SQL_YEARS = """
+SELECT DISTINCT CAST(strftime('%Y', tanggal) AS INT) y
+FROM (SELECT tanggal FROM income UNION ALL SELECT tanggal FROM itinerary)
+WHERE tanggal IS NOT NULL
+ORDER BY y
+"""
+
+SQL_OVER_BUDGET = """
+SELECT ec.name
+FROM expense_category ec
+LEFT JOIN itinerary i
+  ON i.category = ec.name AND i.tanggal >= ? AND i.tanggal < ?
+WHERE ec.monthly_budget > 0
+GROUP BY ec.name
+HAVING COALESCE(SUM(i.actual_budget), 0) > ec.monthly_budget
+"""
+
+INCOME_COLS = ["id", "tanggal", "contributor", "account", "amount"]
+EXPENSE_COLS = ["id", "name", "monthly_budget"]
+ITINERARY_COLS = ["id","tanggal","activity","place","start_time","end_time","duration","category","planned_budget","actual_budget"]
+
+# =========================
+# READ HELPERS
+# =========================
+def load_df(query, cols, params=(), parse_dates=None):
+    try:
+        df = pd.read_sql(query, conn, params=params, parse_dates=parse_dates)
+    except:
+        df = pd.DataFrame(columns=cols)
+        for c in parse_dates or ():
+            df[c] = pd.to_datetime(df[c])
+
+    for c in cols:
+        if c not in df.columns:
+            df[c] = None
+    return df[cols]
+
+@st.cache_data(ttl=300)
+def get_income_df():
+    return load_df(SQL_INCOME_ALL, INCOME_COLS, parse_dates={"tanggal": "%Y-%m-%d"})
+
+@st.cache_data(ttl=300)
+def get_expense_df():
+    return load_df(SQL_EXPENSE_ALL, EXPENSE_COLS)
+
+@st.cache_data(ttl=300)
+def get_itinerary_df():
+    df = load_df(SQL_ITINERARY_ALL, ITINERARY_COLS, parse_dates={"tanggal": "%Y-%m-%d"})
+    df["category"] = df["category"].astype("category")
+    return df
+
+@st.cache_data(ttl=300)
+def expense_names():
+    return get_expense_df()["name"].tolist()
+
+@st.cache_data(ttl=300)
+def expense_budget_map():
+    df = get_expense_df()
+    return dict(zip(df["name"], df["monthly_budget"]))
+
+def month_bounds(year, month):
+    start = date(year, month, 1)
+    nxt = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start.isoformat(), nxt.isoformat()
+
+@st.cache_data(ttl=300)
+def month_totals(year, month):
+    s, e = month_bounds(year, month)
+    return conn.execute(SQL_MONTH_TOTALS, (s, e, s, e)).fetchone()
+
+@st.cache_data(ttl=300)
+def available_years():
+    years = [r[0] for r in conn.execute(SQL_YEARS).fetchall()]
+    return years or [datetime.now().year]
+
+@st.cache_data(ttl=300)
+def over_budget_categories(year, month):
+    s, e = month_bounds(year, month)
+    return [r[0] for r in conn.execute(SQL_OVER_BUDGET, (s, e)).fetchall()]
+
+@st.cache_data(ttl=300)
+def category_actuals(year, month):
+    s, e = month_bounds(year, month)
+    rows = conn.execute(SQL_CATEGORY_ACTUALS, (s, e)).fetchall()
+    return dict(rows)